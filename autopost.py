@@ -1,15 +1,30 @@
 import os
+import re
 import ftplib
+import functools
 import io
 import smtplib
 import ssl
 import datetime
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from email.message import EmailMessage
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Callable, NamedTuple
 
 from PIL import Image, ImageDraw, ImageFont
 
+# lxml (libxml2) parses and queries faster; the stdlib parser has the same API
+try:
+    from lxml import etree as ET
+    # We never look elements up by ID or read whitespace between tags, so
+    # skip the ID table and drop blank text nodes while parsing
+    XML_PARSE_OPTIONS: Dict[str, Any] = {"collect_ids": False, "remove_blank_text": True}
+except ImportError:
+    import xml.etree.ElementTree as ET
+    XML_PARSE_OPTIONS = {}
+
 # ----------------- Config from environment -----------------
 FTP_SERVER = os.environ.get("FTP_SERVER")
 FTP_USER = os.environ.get("FTP_USER")
@@ -18,11 +33,13 @@ FTP_PASS = os.environ.get("FTP_PASS")
 EMAIL_ADDRESS = os.environ.get("EMAIL_ADDRESS")
 EMAIL_APP_PASSWORD = os.environ.get("EMAIL_APP_PASSWORD")
 
+# Images are attached straight from memory; set SAVE_OUTPUT_IMAGES=1 to also
+# write them to OUT_DIR for debugging.
+SAVE_OUTPUT_IMAGES = os.environ.get("SAVE_OUTPUT_IMAGES") == "1"
+
 # Directories
 XML_DIR = "xml_downloads"
 OUT_DIR = "output"
-os.makedirs(XML_DIR, exist_ok=True)
-os.makedirs(OUT_DIR, exist_ok=True)
 
 # Image constants
 IMG_W = 1080
@@ -33,15 +50,48 @@ BODY_COLOR = (255, 255, 255)     # white
 MARGIN_X = 80
 MARGIN_TOP = 80
 MARGIN_BOTTOM = 80
+MAX_TEXT_WIDTH = IMG_W - 2 * MARGIN_X
+
+# (title, section, body) font sizes, largest first; posts use the first
+# step whose content fits
+FONT_SIZE_STEPS = (
+    (56, 40, 32),
+    (48, 36, 28),
+    (42, 32, 26),
+    (36, 28, 24),
+)
 
 # Your logo file – saved in repo root as logo.png
 LOGO_PATH = "logo.png"
 
+# Font candidates, tried in order
+BOLD_FONTS = ("DejaVuSans-Bold.ttf", "Arial.ttf")
+REGULAR_FONTS = ("DejaVuSans.ttf", "Arial.ttf")
+
+
+# ----------------- Data records -----------------
+class Stat(NamedTuple):
+    """One row of a TopX statistics table."""
+    rank: str
+    name: str
+    wins: str
+    runs: str
+    strike_rate: str
+
+
+class Runner(NamedTuple):
+    """A horse from the drop-in-class or well-handicapped lists."""
+    name: str
+    race_time: str
+    diff: int | None = None   # weightThen - weightNow, in lb
+
 
 # ----------------- Font helpers -----------------
-def load_font(candidates: List[str], size: int) -> ImageFont.ImageFont:
+@functools.lru_cache(maxsize=None)
+def load_font(candidates: Tuple[str, ...], size: int) -> ImageFont.ImageFont:
     """
     Try a few font names, fall back to default.
+    Cached so each face is only opened and parsed once per process.
     """
     for name in candidates:
         try:
@@ -51,12 +101,34 @@ def load_font(candidates: List[str], size: int) -> ImageFont.ImageFont:
     return ImageFont.load_default()
 
 
+def load_font_set(sizes: Tuple[int, int, int]) -> Tuple[ImageFont.ImageFont, ImageFont.ImageFont, ImageFont.ImageFont]:
+    """
+    (title, section, body) fonts for one FONT_SIZE_STEPS entry.
+    """
+    title_size, section_size, body_size = sizes
+    return (
+        load_font(BOLD_FONTS, title_size),
+        load_font(BOLD_FONTS, section_size),
+        load_font(REGULAR_FONTS, body_size),
+    )
+
+
 # ----------------- FTP helpers -----------------
+FTP_BLOCKSIZE = 65536
+FTP_WORKERS = 4
+
+# XML file name, capturing the DDMM code before the extension if present
+XML_NAME_RE = re.compile(r"(\d{4})?\.xml$", re.IGNORECASE)
+
 def ftp_connect() -> ftplib.FTP:
     if not FTP_SERVER or not FTP_USER or not FTP_PASS:
         raise RuntimeError("FTP credentials not set in environment")
     ftp = ftplib.FTP(FTP_SERVER)
-    ftp.login(FTP_USER, FTP_PASS)
+    try:
+        ftp.login(FTP_USER, FTP_PASS)
+    except ftplib.all_errors:
+        ftp.close()
+        raise
     return ftp
 
 
@@ -66,14 +138,21 @@ def list_xml_files_for_date(ftp: ftplib.FTP, target_date: datetime.date) -> List
     Example: 5-NBU-2911.xml -> 2911 for 29/11.
     """
     names = ftp.nlst()
-    xml_names = [n for n in names if n.lower().endswith(".xml")]
+    ddmm = target_date.strftime("%d%m")
+
+    # One pass: collect all XML files and those dated DDMM
+    xml_names: List[str] = []
+    filtered: List[str] = []
+    for n in names:
+        m = XML_NAME_RE.search(n)
+        if m is None:
+            continue
+        xml_names.append(n)
+        if m.group(1) == ddmm:
+            filtered.append(n)
     if not xml_names:
         return []
 
-    ddmm = target_date.strftime("%d%m")
-    # last 8..4 chars are DDMM
-    filtered = [n for n in xml_names if len(n) >= 8 and n[-8:-4] == ddmm]
-
     if not filtered:
         # safety fallback (shouldn't normally happen)
         filtered = xml_names
@@ -91,51 +170,166 @@ def list_xml_files_for_date(ftp: ftplib.FTP, target_date: datetime.date) -> List
     return filtered
 
 
-def download_xml_files(target_date: datetime.date) -> List[str]:
+def download_xml_file(ftp: ftplib.FTP, name: str) -> str | None:
+    """
+    Download one file into XML_DIR. Returns the local path, or None if the
+    transfer failed.
+    """
+    print(f"Downloading {name} from FTP...")
+    local_path = os.path.join(XML_DIR, name)
+    # Stream straight to disk in 64 KiB blocks, no copy held in memory
+    try:
+        with open(local_path, "wb") as f:
+            ftp.retrbinary(f"RETR {name}", f.write, blocksize=FTP_BLOCKSIZE)
+    except Exception as e:
+        print(f"  -> failed: {e}")
+        # don't leave a truncated file behind
+        try:
+            os.remove(local_path)
+        except OSError:
+            pass
+        return None
+    return local_path
+
+
+def download_xml_files(target_date: datetime.date,
+                       on_download: Callable[[str], None] | None = None) -> List[str]:
+    """
+    Download the day's XML files. on_download, if given, is called with each
+    local path as soon as that file is on disk so callers can start on it
+    while the rest are still transferring.
+    """
+    os.makedirs(XML_DIR, exist_ok=True)
     ftp = ftp_connect()
+    # Transfers are latency-bound, so fetch several files at once. An FTP
+    # connection can only run one transfer at a time, so each thread borrows
+    # its own from this pool; the listing connection is reused and at most
+    # FTP_WORKERS are opened in total. Many feed accounts cap concurrent
+    # logins, so after the first refused login no more are attempted and
+    # threads wait for a pooled session instead (worst case: one session,
+    # as if downloading serially).
+    idle: "queue.Queue[ftplib.FTP]" = queue.Queue()
+    idle.put(ftp)
+    opened = [ftp]
+    opened_lock = threading.Lock()
+    login_refused = threading.Event()
+
+    def fetch(name: str) -> str | None:
+        try:
+            conn = idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            if not login_refused.is_set():
+                try:
+                    conn = ftp_connect()
+                except ftplib.all_errors as e:
+                    print(f"Extra FTP session refused ({e}); reusing open sessions")
+                    login_refused.set()
+            if conn is None:
+                conn = idle.get()
+            else:
+                with opened_lock:
+                    opened.append(conn)
+        try:
+            return download_xml_file(conn, name)
+        finally:
+            idle.put(conn)
+
     try:
         xml_names = list_xml_files_for_date(ftp, target_date)
         downloaded_paths: List[str] = []
         print(f"Target meeting date: {target_date.isoformat()}")
-        for name in xml_names:
-            print(f"Downloading {name} from FTP...")
-            bio = io.BytesIO()
-            try:
-                ftp.retrbinary(f"RETR {name}", bio.write)
-            except Exception as e:
-                print(f"  -> failed: {e}")
-                continue
-            bio.seek(0)
-            local_path = os.path.join(XML_DIR, name)
-            with open(local_path, "wb") as f:
-                f.write(bio.read())
-            downloaded_paths.append(local_path)
+        workers = max(1, min(FTP_WORKERS, len(xml_names)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # map() yields in listing order, so 5- files still come first
+            for local_path in executor.map(fetch, xml_names):
+                if local_path is None:
+                    continue
+                downloaded_paths.append(local_path)
+                if on_download is not None:
+                    on_download(local_path)
         print("Downloaded XML files:", downloaded_paths)
         return downloaded_paths
     finally:
-        ftp.quit()
+        for conn in opened:
+            try:
+                conn.quit()
+            except ftplib.all_errors:
+                conn.close()
 
 
 # ----------------- XML parsing -----------------
-def parse_meeting_file(path: str, target_date: datetime.date) -> Dict[str, Any] | None:
-    tree = ET.parse(path)
-    root = tree.getroot()
-    meeting = root.find("Meeting")
-    if meeting is None:
+def parse_int(value: str | None) -> int | None:
+    """
+    Parse the small numbers in the XML; None if missing or not a number.
+    Accepts what int() does for these fields (surrounding whitespace, a
+    leading sign) but checks isdecimal() first rather than catching ValueError.
+    """
+    if not value:
         return None
+    value = value.strip()
+    digits = value[1:] if value[:1] in ("+", "-") else value
+    return int(value) if digits.isdecimal() else None
 
-    date_str = meeting.attrib.get("date")
+
+def parse_meeting_date(date_str: str | None) -> datetime.date | None:
+    """
+    Meeting dates are DD/MM/YYYY; returns None if missing or malformed.
+    """
     if not date_str:
         return None
-
     try:
         day, month, year = map(int, date_str.split("/"))
-        meet_date = datetime.date(year, month, day)
-    except Exception:
+        return datetime.date(year, month, day)
+    except ValueError:
         return None
 
-    # Only keep meetings for the requested date
-    if meet_date != target_date:
+
+def parse_meeting_file(path: str, target_date: datetime.date) -> Dict[str, Any] | None:
+    # Stream the file rather than building the whole tree. Only the Course
+    # and MiscStatistics children of the first Meeting are kept; everything
+    # else (race cards etc.) is cleared as each element finishes, and parsing
+    # stops once both kept children are complete (or at the end of that
+    # Meeting if one is missing).
+    meeting = None
+    depth = 0
+    keeping = False
+    kept_tags = set()
+    for event, elem in ET.iterparse(path, events=("start", "end"), **XML_PARSE_OPTIONS):
+        if event == "start":
+            depth += 1
+            if depth == 2 and meeting is None and elem.tag == "Meeting":
+                # The date is on the start tag, so files for other days are
+                # rejected before any of their contents are parsed
+                if parse_meeting_date(elem.attrib.get("date")) != target_date:
+                    return None
+                meeting = elem
+            elif depth == 3 and meeting is not None and elem.tag in ("Course", "MiscStatistics"):
+                keeping = True
+            continue
+        depth -= 1
+        if meeting is None:
+            continue
+        if depth == 1:
+            break
+        if keeping:
+            if depth == 2:
+                keeping = False
+                # Only the first Course and MiscStatistics are read, so
+                # nothing after them matters
+                kept_tags.add(elem.tag)
+                if len(kept_tags) == 2:
+                    break
+            continue
+        elem.clear()
+        # Cleared elements still leave an empty shell in their parent. lxml
+        # lets us drop the finished siblings too; only below depth 2, so the
+        # kept Course/MiscStatistics children of Meeting are never touched.
+        if depth > 2 and hasattr(elem, "getprevious"):
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    if meeting is None:
         return None
 
     meeting_name = meeting.attrib.get("name", "").strip()
@@ -146,62 +340,57 @@ def parse_meeting_file(path: str, target_date: datetime.date) -> Dict[str, Any]
     if stats is None:
         return None
 
-    topx = stats.find("TopXStatistics")
+    # Index the stat blocks in one pass each instead of a find() per lookup
+    # (setdefault keeps the first match, like find() does)
+    stat_blocks: Dict[str, Any] = {}
+    for child in stats:
+        stat_blocks.setdefault(child.tag, child)
+
+    topx = stat_blocks.get("TopXStatistics")
     if topx is None:
         return None
 
-    def get_top_list(stat_type: str) -> List[Dict[str, str]]:
-        node = None
-        for s in topx.findall("TopXStatistic"):
-            if s.attrib.get("statisticType") == stat_type:
-                node = s
-                break
-        items: List[Dict[str, str]] = []
-        if node is not None:
-            for st in node.findall("Statistic")[:5]:
-                items.append({
-                    "rank": st.attrib.get("rank", ""),
-                    "name": st.attrib.get("name", ""),
-                    "wins": st.attrib.get("wins", ""),
-                    "runs": st.attrib.get("runs", ""),
-                    "strikeRate": st.attrib.get("strikeRate", ""),
-                })
-        return items
+    top_by_type: Dict[str, Any] = {}
+    for node in topx.findall("TopXStatistic"):
+        top_by_type.setdefault(node.attrib.get("statisticType"), node)
+
+    def get_top_list(stat_type: str) -> List[Stat]:
+        node = top_by_type.get(stat_type)
+        if node is None:
+            return []
+        return [
+            Stat(
+                st.attrib.get("rank", ""),
+                st.attrib.get("name", ""),
+                st.attrib.get("wins", ""),
+                st.attrib.get("runs", ""),
+                st.attrib.get("strikeRate", ""),
+            )
+            for st in node.findall("Statistic")[:5]
+        ]
 
     top_track_trainers = get_top_list("TopTrackTrainers")
     top_track_jockeys = get_top_list("TopTrackJockeys")
     hot_trainers = get_top_list("HotTrainers")
     hot_jockeys = get_top_list("HotJockeys")
 
-    drop_runners: List[Dict[str, str]] = []
-    drop_node = stats.find("RunnerDropInClass")
+    drop_runners: List[Runner] = []
+    drop_node = stat_blocks.get("RunnerDropInClass")
     if drop_node is not None:
         for r in drop_node.findall("Runner"):
-            drop_runners.append({
-                "name": r.attrib.get("name", ""),
-                "raceTime": r.attrib.get("raceTime", ""),
-            })
+            drop_runners.append(Runner(r.attrib.get("name", ""), r.attrib.get("raceTime", "")))
 
-    won_runners: List[Dict[str, str]] = []
-    won_node = stats.find("WonOffHigherHandicap")
+    won_runners: List[Runner] = []
+    won_node = stat_blocks.get("WonOffHigherHandicap")
     if won_node is not None:
         for r in won_node.findall("Runner")[:5]:
             weight_node = r.find("Weight")
-            weight_then = weight_node.attrib.get("weightThen") if weight_node is not None else ""
-            weight_now = weight_node.attrib.get("weightNow") if weight_node is not None else ""
-            diff = ""
-            try:
-                if weight_then and weight_now:
-                    diff_val = int(weight_then) - int(weight_now)
-                    if diff_val > 0:
-                        diff = str(diff_val)
-            except Exception:
-                diff = ""
-            won_runners.append({
-                "name": r.attrib.get("name", ""),
-                "raceTime": r.attrib.get("raceTime", ""),
-                "diff": diff,
-            })
+            weight_then = parse_int(weight_node.attrib.get("weightThen")) if weight_node is not None else None
+            weight_now = parse_int(weight_node.attrib.get("weightNow")) if weight_node is not None else None
+            diff = None
+            if weight_then is not None and weight_now is not None:
+                diff = weight_then - weight_now
+            won_runners.append(Runner(r.attrib.get("name", ""), r.attrib.get("raceTime", ""), diff))
 
     if not (top_track_trainers or top_track_jockeys or hot_trainers or hot_jockeys or drop_runners or won_runners):
         return None
@@ -209,7 +398,7 @@ def parse_meeting_file(path: str, target_date: datetime.date) -> Dict[str, Any]
     return {
         "meeting_name": meeting_name,
         "tla": tla,
-        "date": meet_date,
+        "date": target_date,
         "top_track_trainers": top_track_trainers,
         "top_track_jockeys": top_track_jockeys,
         "hot_trainers": hot_trainers,
@@ -219,11 +408,7 @@ def parse_meeting_file(path: str, target_date: datetime.date) -> Dict[str, Any]
     }
 
 
-def ordinal(rank_str: str) -> str:
-    try:
-        n = int(rank_str)
-    except Exception:
-        return rank_str
+def format_ordinal(n: int) -> str:
     if 10 <= n % 100 <= 20:
         suffix = "th"
     else:
@@ -231,40 +416,100 @@ def ordinal(rank_str: str) -> str:
     return f"{n}{suffix}"
 
 
+# Ranks come from top-5 tables, so the common labels are precomputed
+_ORDINALS = tuple(format_ordinal(n) for n in range(21))
+
+
+def ordinal(rank_str: str) -> str:
+    n = parse_int(rank_str)
+    if n is None:
+        return rank_str
+    if 0 <= n < len(_ORDINALS):
+        return _ORDINALS[n]
+    return format_ordinal(n)
+
+
 # ----------------- Text layout helpers -----------------
-def text_width(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont) -> int:
-    if not text:
-        return 0
-    bbox = draw.textbbox((0, 0), text, font=font)
-    return bbox[2] - bbox[0]
+@functools.lru_cache(maxsize=4096)
+def text_length(font: ImageFont.ImageFont, text: str) -> float:
+    """
+    Advance width of text, memoized per font. The same words recur across
+    lines, posts, font-size attempts and the measure and draw passes.
+    """
+    return font.getlength(text)
 
 
-def wrap_text(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int) -> List[str]:
+@functools.lru_cache(maxsize=None)
+def line_height(font: ImageFont.ImageFont) -> int:
+    """
+    Height of one line of text in font (bottom of "Ag"), measured once per font.
+    """
+    return font.getbbox("Ag")[3]
+
+
+@functools.lru_cache(maxsize=1024)
+def wrap_text(text: str, font: ImageFont.ImageFont, max_width: int) -> Tuple[str, ...]:
     """
     Simple word-wrap so lines don't go off the edge.
+    Each word is measured once and the line width kept as a running sum,
+    instead of re-measuring the whole line every time a word is added.
+    Only needs the font, so results are memoized and shared between the
+    measure and draw passes.
     """
     words = text.split()
     if not words:
-        return [""]
+        return ("",)
+    space_w = text_length(font, " ")
     lines: List[str] = []
-    current = words[0]
+    current = [words[0]]
+    line_w = text_length(font, words[0])
     for w in words[1:]:
-        test = current + " " + w
-        if text_width(draw, test, font) <= max_width:
-            current = test
+        word_w = text_length(font, w)
+        if line_w + space_w + word_w <= max_width:
+            current.append(w)
+            line_w += space_w + word_w
         else:
-            lines.append(current)
-            current = w
-    lines.append(current)
-    return lines
+            lines.append(" ".join(current))
+            current = [w]
+            line_w = word_w
+    lines.append(" ".join(current))
+    return tuple(lines)
+
+
+@functools.lru_cache(maxsize=256)
+def text_mask(font: ImageFont.ImageFont, text: str) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Rasterize text once into an "L" coverage mask.
+    Returns (mask, (dx, dy)) where (dx, dy) is the ink box offset from the
+    draw origin, matching where draw.text would put it.
+    """
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+    return mask, (left, top)
+
+
+def draw_cached_text(im: Image.Image, xy: Tuple[int, int], text: str,
+                     font: ImageFont.ImageFont, fill: Tuple[int, int, int]) -> None:
+    """
+    Same pixels as draw.text, but pastes a cached mask so text repeated
+    across posts is only shaped and rasterized once.
+    """
+    mask, (dx, dy) = text_mask(font, text)
+    im.paste(fill, (xy[0] + dx, xy[1] + dy), mask)
 
 
+@functools.lru_cache(maxsize=1)
 def load_logo() -> Image.Image | None:
-    if not os.path.exists(LOGO_PATH):
-        print("Logo file not found at", LOGO_PATH)
-        return None
+    """
+    Decode and resize the logo once; every post pastes the same image.
+    A missing or broken logo is cached as None too, so it is never retried.
+    """
     try:
         logo = Image.open(LOGO_PATH).convert("RGBA")
+    except FileNotFoundError:
+        print("Logo file not found at", LOGO_PATH)
+        return None
     except Exception as e:
         print("Could not open logo:", e)
         return None
@@ -287,30 +532,50 @@ def load_logo() -> Image.Image | None:
         scale = max_w / float(w)
         new_w = int(w * scale)
         new_h = int(h * scale)
-    
+
+    # A logo already exported at the target size needs no resampling
+    if (new_w, new_h) == logo.size:
+        return logo
+
     return logo.resize((new_w, new_h), Image.LANCZOS)
 
 
-def calculate_content_height(draw: ImageDraw.ImageDraw, title: str, sections: List[Dict[str, Any]], 
+@functools.lru_cache(maxsize=1)
+def load_post_template() -> Tuple[Image.Image, int]:
+    """
+    Background with the logo pasted top-left, built once per process.
+    Returns (template, logo_height); posts start from template.copy(),
+    a single memcpy instead of a fill plus an alpha composite.
+    """
+    im = Image.new("RGB", (IMG_W, IMG_H), BG_COLOR)
+    logo = load_logo()
+    logo_height = 0
+    if logo is not None:
+        im.paste(logo, (MARGIN_X, MARGIN_TOP), logo)
+        _, logo_height = logo.size
+    return im, logo_height
+
+
+def calculate_content_height(title: str, sections: List[Dict[str, Any]], 
                             title_font: ImageFont.ImageFont, section_font: ImageFont.ImageFont, 
                             body_font: ImageFont.ImageFont, max_text_width: int, logo_height: int) -> int:
     """Calculate total height needed for all content"""
     height = MARGIN_TOP + (logo_height + 30 if logo_height else 0)
     
     # Title
-    title_lines = wrap_text(draw, title, title_font, max_text_width)
-    line_h = title_font.getbbox("Ag")[3]
+    title_lines = wrap_text(title, title_font, max_text_width)
+    line_h = line_height(title_font)
     height += len(title_lines) * (line_h + 8) + 10
     
     # Sections
     for sec in sections:
-        heading_lines = wrap_text(draw, sec["heading"], section_font, max_text_width)
-        heading_h = section_font.getbbox("Ag")[3]
+        heading_lines = wrap_text(sec["heading"], section_font, max_text_width)
+        heading_h = line_height(section_font)
         height += len(heading_lines) * (heading_h + 6) + 6
         
-        body_h = body_font.getbbox("Ag")[3]
+        body_h = line_height(body_font)
         for text in sec["lines"]:
-            wrapped = wrap_text(draw, text, body_font, max_text_width)
+            wrapped = wrap_text(text, body_font, max_text_width)
             height += len(wrapped) * (body_h + 6)
         
         height += 12  # gap between sections
@@ -318,59 +583,42 @@ def calculate_content_height(draw: ImageDraw.ImageDraw, title: str, sections: Li
     return height
 
 
-def render_post_image(title: str, sections: List[Dict[str, Any]], out_path: str) -> str:
+def render_post_image(title: str, sections: List[Dict[str, Any]]) -> Image.Image:
     """
     sections: list of {"heading": str, "lines": [str, ...]}
     """
-    im = Image.new("RGB", (IMG_W, IMG_H), BG_COLOR)
+    # ---- Background + logo, copied from the shared template ----
+    template, logo_height = load_post_template()
+    im = template.copy()
     draw = ImageDraw.Draw(im)
 
-    # ---- Logo at top-left ----
-    logo = load_logo()
-    logo_height = 0
-    if logo is not None:
-        im.paste(logo, (MARGIN_X, MARGIN_TOP), logo)
-        _, logo_height = logo.size
+    max_text_width = MAX_TEXT_WIDTH
 
-    max_text_width = IMG_W - 2 * MARGIN_X
-    available_height = IMG_H - MARGIN_TOP - MARGIN_BOTTOM - (logo_height + 30 if logo_height else 0)
-    
     # Try different font sizes until content fits
-    title_sizes = [56, 48, 42, 36]
-    section_sizes = [40, 36, 32, 28]
-    body_sizes = [32, 28, 26, 24]
-    
     best_fonts = None
-    for t_size, s_size, b_size in zip(title_sizes, section_sizes, body_sizes):
-        title_font = load_font(["DejaVuSans-Bold.ttf", "Arial.ttf"], t_size)
-        section_font = load_font(["DejaVuSans-Bold.ttf", "Arial.ttf"], s_size)
-        body_font = load_font(["DejaVuSans.ttf", "Arial.ttf"], b_size)
-        
-        content_height = calculate_content_height(draw, title, sections, title_font, 
+    for sizes in FONT_SIZE_STEPS:
+        title_font, section_font, body_font = load_font_set(sizes)
+        content_height = calculate_content_height(title, sections, title_font,
                                                   section_font, body_font, max_text_width, logo_height)
-        
         if content_height <= IMG_H - MARGIN_BOTTOM:
             best_fonts = (title_font, section_font, body_font)
             break
-    
+
     # Fallback to smallest size if nothing fits
     if best_fonts is None:
-        best_fonts = (
-            load_font(["DejaVuSans-Bold.ttf", "Arial.ttf"], title_sizes[-1]),
-            load_font(["DejaVuSans-Bold.ttf", "Arial.ttf"], section_sizes[-1]),
-            load_font(["DejaVuSans.ttf", "Arial.ttf"], body_sizes[-1])
-        )
-    
+        best_fonts = load_font_set(FONT_SIZE_STEPS[-1])
+
     title_font, section_font, body_font = best_fonts
 
     # ---- Title under logo ----
     title_x = MARGIN_X
     title_y = MARGIN_TOP + (logo_height + 30 if logo_height else 0)
 
-    title_lines = wrap_text(draw, title, title_font, max_text_width)
+    title_lines = wrap_text(title, title_font, max_text_width)
     for line in title_lines:
-        draw.text((title_x, title_y), line, font=title_font, fill=HEADING_COLOR)
-        line_h = title_font.getbbox("Ag")[3]
+        # Same title on every post for a meeting
+        draw_cached_text(im, (title_x, title_y), line, title_font, HEADING_COLOR)
+        line_h = line_height(title_font)
         title_y += line_h + 8
 
     y = title_y + 10  # start of content below title
@@ -381,20 +629,21 @@ def render_post_image(title: str, sections: List[Dict[str, Any]], out_path: str)
         lines = sec["lines"]
 
         # Heading (gold)
-        heading_lines = wrap_text(draw, heading, section_font, max_text_width)
+        heading_lines = wrap_text(heading, section_font, max_text_width)
         for hl in heading_lines:
             if y > IMG_H - MARGIN_BOTTOM:
                 break
-            draw.text((MARGIN_X, y), hl, font=section_font, fill=HEADING_COLOR)
-            line_h = section_font.getbbox("Ag")[3]
+            # Headings are fixed strings, repeated for every meeting
+            draw_cached_text(im, (MARGIN_X, y), hl, section_font, HEADING_COLOR)
+            line_h = line_height(section_font)
             y += line_h + 6
         y += 6  # extra space after heading
 
         # Body lines (white)
         for text in lines:
-            wrapped = wrap_text(draw, text, body_font, max_text_width)
+            wrapped = wrap_text(text, body_font, max_text_width)
             for wline in wrapped:
-                line_h = body_font.getbbox("Ag")[3]
+                line_h = line_height(body_font)
                 if y > IMG_H - MARGIN_BOTTOM - line_h:
                     # no more vertical space
                     break
@@ -410,13 +659,96 @@ def render_post_image(title: str, sections: List[Dict[str, Any]], out_path: str)
         if y > IMG_H - MARGIN_BOTTOM:
             break
 
-    im.save(out_path)
-    print("Saved image:", out_path)
-    return out_path
+    return im
+
+
+def save_post_image(im: Image.Image, out_path: str) -> Tuple[str, bytes]:
+    """
+    Encode to PNG, writing it to out_path only when SAVE_OUTPUT_IMAGES is set.
+    Returns (out_path, png_bytes) so the email can attach the encoded
+    image without touching the disk.
+    """
+    # Flat navy background compresses well even at level 1; the default
+    # level 6 spends most of the encode time in zlib for little gain.
+    buf = io.BytesIO()
+    im.save(buf, format="PNG", compress_level=1)
+    data = buf.getvalue()
+    if SAVE_OUTPUT_IMAGES:
+        with open(out_path, "wb") as f:
+            f.write(data)
+        print("Saved image:", out_path)
+    return out_path, data
 
 
 # ----------------- Email -----------------
-def send_email(image_paths: List[str], target_date: datetime.date, meeting_names: List[str]) -> None:
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+
+
+@functools.lru_cache(maxsize=1)
+def smtp_ssl_context() -> ssl.SSLContext:
+    """
+    Default TLS context, built on first use and shared by every connect.
+    Loading the system CA bundle is the slow part, and spawned render
+    workers never need it, so this is not done at import.
+    """
+    return ssl.create_default_context()
+
+
+class SMTPSession:
+    """
+    Logged-in SMTP_SSL connection for sending several messages without a new
+    TLS handshake and login each time. Use as a context manager.
+    """
+
+    def __init__(self) -> None:
+        self.smtp: smtplib.SMTP_SSL | None = None
+        self.sent = 0
+
+    def connect(self) -> None:
+        self.smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, context=smtp_ssl_context())
+        # The TLS socket is already open; __exit__ won't run if __enter__ fails
+        try:
+            self.smtp.login(EMAIL_ADDRESS, EMAIL_APP_PASSWORD)
+        except Exception:
+            self.smtp.close()
+            raise
+
+    def send(self, msg: EmailMessage) -> None:
+        # Check a reused connection is still alive; reconnect if the server dropped it
+        if self.sent:
+            try:
+                self.smtp.noop()
+            except smtplib.SMTPServerDisconnected:
+                self.smtp.close()
+                self.connect()
+        self.smtp.send_message(msg)
+        self.sent += 1
+
+    def __enter__(self) -> "SMTPSession":
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        # Like smtplib.SMTP.__exit__, always close the socket; also never let
+        # a failed QUIT hide the exception that ended the with-block
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except smtplib.SMTPServerDisconnected:
+            pass
+        except (smtplib.SMTPException, OSError):
+            if exc_info[0] is None:
+                raise
+        finally:
+            self.smtp.close()
+
+
+def send_email(images: List[Tuple[str, bytes]], target_date: datetime.date, meeting_names: List[str]) -> None:
+    """
+    images: list of (path, png_bytes) as returned by save_post_image.
+    """
     if not EMAIL_ADDRESS or not EMAIL_APP_PASSWORD:
         raise RuntimeError("Email credentials not set in environment")
 
@@ -425,7 +757,7 @@ def send_email(image_paths: List[str], target_date: datetime.date, meeting_names
     msg["From"] = EMAIL_ADDRESS
     msg["To"] = EMAIL_ADDRESS
 
-    if image_paths and meeting_names:
+    if images and meeting_names:
         # Build the social media post
         meeting_list = " · ".join(meeting_names)
         hashtags = " ".join([f"#{name.lower().replace(' ', '')}" for name in meeting_names])
@@ -450,9 +782,7 @@ Here are your standout stats for today — top trainers, in-form jockeys, and ho
             f"No meetings were found in the XML files for {target_date.strftime('%d %b %Y')}."
         )
 
-    for path in image_paths:
-        with open(path, "rb") as f:
-            data = f.read()
+    for path, data in images:
         msg.add_attachment(
             data,
             maintype="image",
@@ -460,114 +790,98 @@ Here are your standout stats for today — top trainers, in-form jockeys, and ho
             filename=os.path.basename(path),
         )
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as smtp:
-        smtp.login(EMAIL_ADDRESS, EMAIL_APP_PASSWORD)
-        smtp.send_message(msg)
-    print("Email sent with", len(image_paths), "attachments")
+    with SMTPSession() as session:
+        session.send(msg)
+    print("Email sent with", len(images), "attachments")
 
 
 # ----------------- Build content for posts -----------------
+def trainer_line(item: Stat) -> str:
+    return f"{ordinal(item.rank)} {item.name} – {item.strike_rate}% strike rate ({item.wins} wins from {item.runs} runners)"
+
+
+def jockey_line(item: Stat) -> str:
+    return f"{ordinal(item.rank)} {item.name} – {item.strike_rate}% strike rate ({item.wins} wins from {item.runs} rides)"
+
+
+def drop_line(r: Runner) -> str:
+    if r.race_time:
+        return f"{r.name} running in the {r.race_time}"
+    return r.name
+
+
+def won_line(r: Runner) -> str:
+    if r.diff is not None and r.diff > 0:
+        return f"{r.name} won off a {r.diff}lb higher mark – runs in the {r.race_time} today"
+    return f"{r.name} – runs in the {r.race_time} today"
+
+
+# One entry per post, each a list of (heading, meeting key, line formatter);
+# sections with no data are dropped and posts with no sections are skipped
+POST_SPECS: Tuple[Tuple[Tuple[str, str, Callable[[Any], str]], ...], ...] = (
+    # Post 1: Top track trainers/jockeys (last 5 years)
+    (
+        ("Top Track Trainers – Last 5 Years", "top_track_trainers", trainer_line),
+        ("Top Track Jockeys – Last 5 Years", "top_track_jockeys", jockey_line),
+    ),
+    # Post 2: Hot trainers/jockeys (last month)
+    (
+        ("Hot Trainers (Last Month)", "hot_trainers", trainer_line),
+        ("Hot Jockeys (Last Month)", "hot_jockeys", jockey_line),
+    ),
+    # Post 3: Dropping in class + well handicapped
+    (
+        ("Horses Dropping in Class", "drop_runners", drop_line),
+        ("Well Handicapped Horses", "won_runners", won_line),
+    ),
+)
+
+
 def build_posts_for_meeting(meeting: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Returns list of posts; each post is {"title": str, "sections": [...]}
     """
-    meeting_name = meeting["meeting_name"]
-
-    # Helpers
-    def trainer_line(item: Dict[str, str]) -> str:
-        rank_str = ordinal(item.get("rank", ""))
-        name = item.get("name", "")
-        wins = item.get("wins", "")
-        runs = item.get("runs", "")
-        sr = item.get("strikeRate", "")
-        return f"{rank_str} {name} – {sr}% strike rate ({wins} wins from {runs} runners)"
-
-    def jockey_line(item: Dict[str, str]) -> str:
-        rank_str = ordinal(item.get("rank", ""))
-        name = item.get("name", "")
-        wins = item.get("wins", "")
-        runs = item.get("runs", "")
-        sr = item.get("strikeRate", "")
-        return f"{rank_str} {name} – {sr}% strike rate ({wins} wins from {runs} rides)"
+    posts: List[Dict[str, Any]] = []
+    for spec in POST_SPECS:
+        sections = [
+            {"heading": heading, "lines": [line_fn(item) for item in meeting[key]]}
+            for heading, key, line_fn in spec
+            if meeting[key]
+        ]
+        if sections:
+            posts.append({
+                "title": meeting["meeting_name"],
+                "sections": sections,
+            })
+    return posts
 
-    # Post 1: Top track trainers/jockeys (last 5 years)
-    sections1: List[Dict[str, Any]] = []
-    if meeting["top_track_trainers"]:
-        sections1.append({
-            "heading": "Top Track Trainers – Last 5 Years",
-            "lines": [trainer_line(it) for it in meeting["top_track_trainers"]],
-        })
-    if meeting["top_track_jockeys"]:
-        sections1.append({
-            "heading": "Top Track Jockeys – Last 5 Years",
-            "lines": [jockey_line(it) for it in meeting["top_track_jockeys"]],
-        })
 
-    # Post 2: Hot trainers/jockeys (last month)
-    sections2: List[Dict[str, Any]] = []
-    if meeting["hot_trainers"]:
-        sections2.append({
-            "heading": "Hot Trainers (Last Month)",
-            "lines": [trainer_line(it) for it in meeting["hot_trainers"]],
-        })
-    if meeting["hot_jockeys"]:
-        sections2.append({
-            "heading": "Hot Jockeys (Last Month)",
-            "lines": [jockey_line(it) for it in meeting["hot_jockeys"]],
-        })
+def init_render_worker() -> None:
+    """
+    Process pool initializer: decode the logo, build the post template and
+    open every font size when the worker starts, ahead of its first meeting.
+    """
+    load_post_template()
+    for sizes in FONT_SIZE_STEPS:
+        load_font_set(sizes)
 
-    # Post 3: Dropping in class + well handicapped
-    sections3: List[Dict[str, Any]] = []
-    drop = meeting["drop_runners"]
-    won = meeting["won_runners"]
-
-    if drop:
-        lines = []
-        for r in drop:
-            name = r.get("name", "")
-            time = r.get("raceTime", "")
-            if time:
-                lines.append(f"{name} running in the {time}")
-            else:
-                lines.append(name)
-        sections3.append({
-            "heading": "Horses Dropping in Class",
-            "lines": lines,
-        })
-
-    if won:
-        lines = []
-        for r in won:
-            name = r.get("name", "")
-            time = r.get("raceTime", "")
-            diff = r.get("diff", "")
-            if diff:
-                lines.append(f"{name} won off a {diff}lb higher mark – runs in the {time} today")
-            else:
-                lines.append(f"{name} – runs in the {time} today")
-        sections3.append({
-            "heading": "Well Handicapped Horses",
-            "lines": lines,
-        })
 
-    posts: List[Dict[str, Any]] = []
-    if sections1:
-        posts.append({
-            "title": meeting_name,
-            "sections": sections1,
-        })
-    if sections2:
-        posts.append({
-            "title": meeting_name,
-            "sections": sections2,
-        })
-    if sections3:
-        posts.append({
-            "title": meeting_name,
-            "sections": sections3,
-        })
-    return posts
+def render_meeting_posts(meeting: Dict[str, Any]) -> List[Tuple[str, bytes]]:
+    """
+    Render all posts for one meeting and return (path, png_bytes) for each.
+    Runs in a worker process, so it has to stay a top-level function.
+    """
+    posts = build_posts_for_meeting(meeting)
+    # Pillow releases the GIL while zlib encodes, so each PNG is saved on a
+    # thread while the next post is laid out.
+    with ThreadPoolExecutor(max_workers=2) as encoder:
+        saves: List[Future] = []
+        for idx, post in enumerate(posts, start=1):
+            filename = f"{meeting['tla']}_{meeting['date'].strftime('%d%m')}_post{idx}.png"
+            out_path = os.path.join(OUT_DIR, filename)
+            im = render_post_image(post["title"], post["sections"])
+            saves.append(encoder.submit(save_post_image, im, out_path))
+        return [save.result() for save in saves]
 
 
 # ----------------- Main -----------------
@@ -577,22 +891,62 @@ def main():
     target_date = today
     print("Preparing graphics for date:", target_date)
 
-    xml_paths = download_xml_files(target_date)
-    meetings: Dict[str, Dict[str, Any]] = {}
+    # Created here rather than at import, which every spawned render worker
+    # repeats
+    if SAVE_OUTPUT_IMAGES:
+        os.makedirs(OUT_DIR, exist_ok=True)
+
+    # Download on a background thread and parse/render each file as it lands,
+    # so FTP latency overlaps with rendering. The downloader thread owns the
+    # FTP session pool; its transfer threads each use one session at a time.
+    xml_queue: "queue.Queue[str | None]" = queue.Queue(maxsize=2)
+    download_errors: List[Exception] = []
 
-    for path in xml_paths:
-        print("Parsing", path)
+    def download_worker() -> None:
         try:
-            meeting = parse_meeting_file(path, target_date)
+            download_xml_files(target_date, on_download=xml_queue.put)
         except Exception as e:
-            print("  -> parse failed:", e)
-            continue
-        if not meeting:
-            continue
-        key = f"{meeting['tla']}_{meeting['date'].isoformat()}"
-        # keep first per meeting key (5- files come first due to sorting)
-        if key not in meetings:
-            meetings[key] = meeting
+            download_errors.append(e)
+        finally:
+            xml_queue.put(None)
+
+    downloader = threading.Thread(target=download_worker, daemon=True)
+    downloader.start()
+
+    meetings: Dict[str, Dict[str, Any]] = {}
+    render_jobs: List[Future] = []
+
+    # Meetings are independent, so render them across cores. Workers are
+    # spawned rather than forked because the downloader thread is running.
+    with ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_render_worker) as pool:
+        while True:
+            path = xml_queue.get()
+            if path is None:
+                break
+            print("Parsing", path)
+            try:
+                meeting = parse_meeting_file(path, target_date)
+            except Exception as e:
+                print("  -> parse failed:", e)
+                continue
+            if not meeting:
+                continue
+            key = f"{meeting['tla']}_{meeting['date'].isoformat()}"
+            # keep first per meeting key (5- files come first due to sorting)
+            if key not in meetings:
+                meetings[key] = meeting
+                render_jobs.append(pool.submit(render_meeting_posts, meeting))
+
+        downloader.join()
+        if download_errors:
+            raise download_errors[0]
+
+        # Collect in submission order so attachments stay in meeting order
+        images: List[Tuple[str, bytes]] = []
+        for job in render_jobs:
+            images.extend(job.result())
 
     if not meetings:
         print("No meetings found for target date.")
@@ -601,17 +955,8 @@ def main():
 
     # Collect meeting names for social post
     meeting_names = [meeting['meeting_name'] for meeting in meetings.values()]
-    
-    image_paths: List[str] = []
-    for key, meeting in meetings.items():
-        posts = build_posts_for_meeting(meeting)
-        for idx, post in enumerate(posts, start=1):
-            filename = f"{meeting['tla']}_{target_date.strftime('%d%m')}_post{idx}.png"
-            out_path = os.path.join(OUT_DIR, filename)
-            render_post_image(post["title"], post["sections"], out_path)
-            image_paths.append(out_path)
 
-    send_email(image_paths, target_date, meeting_names)
+    send_email(images, target_date, meeting_names)
 
 
 if __name__ == "__main__":